@@ -0,0 +1,1087 @@
+"""Multi-signal email validation for lead enrichment.
+
+Companion to the `lead_gen` Deluge function: once lead_gen has discovered
+contacts and guessed email addresses, this module scores how likely each
+guess is to be a real, deliverable mailbox by combining independent signals:
+
+  * syntax check
+  * local-part pattern detection against the company's known emails
+  * Gravatar profile existence
+  * agreement between the contact's name and the email local-part
+  * optional Perplexity web-search confirmation (same API as lead_gen)
+  * optional SMTP deliverability probe (verify_email)
+
+Usage:
+    result = validate_email_multi_signal(
+        "john.smith@example.com",
+        person_name="John Smith",
+        company_name="Example Ltd",
+        known_emails=["jane.doe@example.com"],
+    )
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import json
+import os
+import secrets
+import socket
+import string
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass
+
+# re2 compiles patterns to a DFA with guaranteed linear-time matching --
+# no backtracking blowups on adversarial local-parts.  Prefer it when
+# installed; the stdlib engine is a drop-in fallback for the match/search
+# calls used here.
+try:
+    import re2 as _re
+except ImportError:
+    import re as _re
+
+# pyarrow's compute kernels run a regex over a contiguous string array in
+# C -- far faster than a per-element Python loop when gating 10k+ leads.
+try:
+    import pyarrow as _pa
+    import pyarrow.compute as _pc
+except ImportError:
+    _pa = None
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+# numba JIT-compiles the batch scoring kernel to native code; without it
+# the same function runs as plain Python over the arrays.
+try:
+    from numba import njit as _njit
+except ImportError:
+    _njit = None
+
+# A single keep-alive session amortizes TCP+TLS setup across the many
+# Gravatar/Perplexity calls a batch run makes.  requests is preferred but
+# not required -- without it we fall back to one-shot urllib requests.
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    _SESSION = requests.Session()
+    _SESSION.headers.update({"User-Agent": "Mozilla/5.0"})
+    _ADAPTER = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+    _SESSION.mount("https://", _ADAPTER)
+    _SESSION.mount("http://", _ADAPTER)
+except ImportError:
+    requests = None
+    _SESSION = None
+
+PERPLEXITY_API_KEY = os.environ.get("PERPLEXITY_API_KEY")
+PERPLEXITY_URL = "https://api.perplexity.ai/chat/completions"
+PERPLEXITY_MODEL = "sonar"
+
+# Shared pool for the independent network signals (Gravatar, Perplexity)
+# so their latencies overlap instead of adding up.
+_IO_POOL = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
+# Signal weights and confidence thresholds, shared by the per-email path
+# and the batch scoring kernel.
+_SCORE_GRAVATAR = 25
+_SCORE_PATTERN = 10
+_SCORE_PATTERN_KNOWN = 15
+_SCORE_NAME_EXACT = 30
+_SCORE_NAME_PARTIAL = 15
+_SCORE_WEB_PERSON = 30
+_HIGH_THRESHOLD = 70
+_MEDIUM_THRESHOLD = 40
+_CONFIDENCE_LEVELS = ("low", "medium", "high")
+
+# Compiled once at import; these run on every email we score.
+_EMAIL_RE = _re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
+
+# Fast path for the syntax gate: deleting every allowed character must
+# leave an empty string.  str.translate runs in C, so the common case of
+# a well-formed ASCII address never enters the regex engine at all.
+_LOCAL_JUNK = str.maketrans(
+    "", "", string.ascii_letters + string.digits + "._%+-"
+)
+_DOMAIN_JUNK = str.maketrans("", "", string.ascii_letters + string.digits + ".-")
+
+
+def _fast_syntax_ok(email):
+    """Scanner equivalent of ``_EMAIL_RE`` for ASCII input.  Returns True
+    or False for a definitive answer, or None when the input is ambiguous
+    and should be handed to the compiled regex."""
+    if not email.isascii():
+        return None
+    at = email.find("@")
+    if at <= 0:
+        return False
+    local = email[:at]
+    domain = email[at + 1 :]
+    if "@" in domain or local.translate(_LOCAL_JUNK) or domain.translate(_DOMAIN_JUNK):
+        return False
+    dot = domain.rfind(".")
+    if dot < 1:
+        return False
+    tld = domain[dot + 1 :]
+    return len(tld) >= 2 and tld.isalpha()
+
+# All six local-part naming conventions fused into a single alternation so
+# classification is one automaton pass instead of six separate matches.
+# Alternatives are ordered most specific first: "f.lastname" must come
+# before "firstname.lastname" since the latter would also match a
+# single-letter first name.  Group names map to human-readable labels
+# below (group names cannot contain "." or "-").
+_LOCAL_CLASSIFIER = _re.compile(
+    r"^(?:"
+    r"(?P<f_dot_lastname>[a-z]\.[a-z]+)"
+    r"|(?P<firstname_dot_lastname>[a-z]+\.[a-z]+)"
+    r"|(?P<f_us_lastname>[a-z]_[a-z]+)"
+    r"|(?P<firstname_us_lastname>[a-z]+_[a-z]+)"
+    r"|(?P<firstname_dash_lastname>[a-z]+-[a-z]+)"
+    r"|(?P<firstname>[a-z]{2,15})"
+    r")$"
+)
+_PATTERN_LABELS = {
+    "f_dot_lastname": "f.lastname",
+    "firstname_dot_lastname": "firstname.lastname",
+    "f_us_lastname": "f_lastname",
+    "firstname_us_lastname": "firstname_lastname",
+    "firstname_dash_lastname": "firstname-lastname",
+    "firstname": "firstname",
+}
+
+
+@functools.lru_cache(maxsize=100_000)
+def _classify_local(local):
+    """Map a local-part to its convention label, or None if unrecognized."""
+    m = _LOCAL_CLASSIFIER.match(local)
+    if m is None:
+        return None
+    return _PATTERN_LABELS[m.lastgroup]
+
+
+@dataclass(frozen=True, slots=True)
+class ParsedEmail:
+    """An email normalized, split, and hashed exactly once so the signal
+    functions never repeat the work during batch scoring."""
+
+    raw: str
+    local: str
+    domain: str
+    md5: str
+
+
+def parse_email(email):
+    """Normalize ``email`` and parse it into a :class:`ParsedEmail`, or
+    ``None`` if it is not syntactically valid."""
+    normalized = email.lower().strip()
+    ok = _fast_syntax_ok(normalized)
+    if ok is None:
+        ok = _EMAIL_RE.match(normalized) is not None
+    if not ok:
+        return None
+    local, _, domain = normalized.partition("@")
+    return ParsedEmail(
+        raw=normalized,
+        local=local,
+        domain=domain,
+        md5=_md5_hex(normalized),
+    )
+
+
+def _md5_hex(text):
+    """Hex MD5 of an ASCII email string.  usedforsecurity=False lets
+    OpenSSL-backed builds skip the FIPS bookkeeping branch -- this is a
+    cache key, not a security primitive."""
+    return hashlib.new(
+        "md5", text.encode("ascii"), usedforsecurity=False
+    ).hexdigest()
+
+
+def _local_part(email):
+    """Local-part of a ``ParsedEmail`` or a bare string."""
+    if isinstance(email, ParsedEmail):
+        return email.local
+    return email.lower().strip().split("@")[0]
+
+
+def validate_syntax_batch(emails):
+    """Run the syntax gate over a whole batch at once, returning a boolean
+    mask aligned with ``emails``.
+
+    With pyarrow installed the regex is evaluated against a contiguous
+    Arrow string array in C (returned as a numpy array); otherwise the
+    compiled pattern is applied per element and a list comes back.  Feed
+    only the ``True`` entries into the network signal pipeline.
+    """
+    normalized = [e.lower().strip() for e in emails]
+    if _pa is not None:
+        mask = _pc.match_substring_regex(_pa.array(normalized), _EMAIL_RE.pattern)
+        return mask.to_numpy(zero_copy_only=False)
+    return [_EMAIL_RE.match(e) is not None for e in normalized]
+
+
+def check_email_pattern(email, known_emails=None):
+    """Classify the local-part naming convention of ``email`` (a string or
+    :class:`ParsedEmail`) and report whether it matches a convention seen
+    in the company's known emails."""
+    pattern = _classify_local(_local_part(email))
+
+    # Dedupe the input first so each unique known email is classified at
+    # most once, and collect into a set for O(1) membership below.
+    known_patterns = set()
+    for known in set(known_emails or ()):
+        known_pattern = _classify_local(_local_part(known))
+        if known_pattern is not None:
+            known_patterns.add(known_pattern)
+
+    return {
+        "pattern": pattern,
+        "known_patterns": sorted(known_patterns),
+        "matches_known_pattern": pattern is not None and pattern in known_patterns,
+    }
+
+
+def extract_name_from_email(email):
+    """Best-effort guess of (first, last) name parts from the local-part."""
+    local_part = _local_part(email)
+    for sep in (".", "_", "-"):
+        if sep in local_part:
+            head, _, tail = local_part.partition(sep)
+            return {"first": head, "last": tail}
+    return {"first": local_part, "last": None}
+
+
+# Big B2B domains whose mailboxes essentially never carry a Gravatar;
+# probing them is pure wasted traffic on corporate lead lists.
+_NON_GRAVATAR_DOMAINS = frozenset(
+    {
+        "accenture.com",
+        "capgemini.com",
+        "cisco.com",
+        "deloitte.com",
+        "dell.com",
+        "ey.com",
+        "hp.com",
+        "ibm.com",
+        "infosys.com",
+        "intel.com",
+        "kpmg.com",
+        "microsoft.com",
+        "oracle.com",
+        "pwc.com",
+        "salesforce.com",
+        "sap.com",
+        "siemens.com",
+        "tcs.com",
+    }
+)
+
+# Learned equivalent of the static list: after this many consecutive 404s
+# for a domain, stop probing it for the rest of the process.
+_GRAVATAR_MISS_LIMIT = 20
+_GRAVATAR_MISSES = {}
+_GRAVATAR_DEAD = set()
+
+
+def _gravatar_skip(domain):
+    return domain in _NON_GRAVATAR_DOMAINS or domain in _GRAVATAR_DEAD
+
+
+def _note_gravatar_result(domain, has_gravatar):
+    if has_gravatar:
+        _GRAVATAR_MISSES.pop(domain, None)
+        _GRAVATAR_DEAD.discard(domain)
+        return
+    if len(_GRAVATAR_MISSES) > 10000:
+        _GRAVATAR_MISSES.clear()
+    misses = _GRAVATAR_MISSES.get(domain, 0) + 1
+    _GRAVATAR_MISSES[domain] = misses
+    if misses >= _GRAVATAR_MISS_LIMIT:
+        _GRAVATAR_DEAD.add(domain)
+
+
+def _gravatar_hash(email):
+    normalized = email.lower().strip()
+    if normalized.isascii():
+        return _md5_hex(normalized)
+    # Gravatar hashes non-ASCII addresses as UTF-8.
+    return hashlib.new(
+        "md5", normalized.encode(), usedforsecurity=False
+    ).hexdigest()
+
+
+@functools.lru_cache(maxsize=10000)
+def _gravatar_probe(email_hash, domain):
+    """HEAD-probe gravatar.com for ``email_hash``, returning
+    ``(has_gravatar, profile_url)``.
+
+    Cached by hash so batch scoring never re-hits gravatar.com for a
+    duplicate email; ``domain`` rides along so fresh probe outcomes feed
+    the per-domain miss tracking.  Transient failures raise instead of
+    returning so the cache only ever holds definitive yes/no answers.
+    """
+    gravatar_url = "https://www.gravatar.com/avatar/%s?d=404" % email_hash
+    if _SESSION is not None:
+        resp = _SESSION.head(gravatar_url, timeout=5, allow_redirects=False)
+        if resp.status_code == 200:
+            _note_gravatar_result(domain, True)
+            return True, "https://www.gravatar.com/%s" % email_hash
+        if resp.status_code == 404:
+            _note_gravatar_result(domain, False)
+            return False, None
+        resp.raise_for_status()
+        return False, None
+    req = urllib.request.Request(
+        gravatar_url, method="HEAD", headers={"User-Agent": "Mozilla/5.0"}
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            if resp.status == 200:
+                _note_gravatar_result(domain, True)
+                return True, "https://www.gravatar.com/%s" % email_hash
+            return False, None
+    except urllib.error.HTTPError as exc:
+        if exc.code == 404:
+            _note_gravatar_result(domain, False)
+            return False, None
+        raise
+
+
+def check_gravatar(email):
+    """Check gravatar.com for a profile registered to ``email`` (a string
+    or :class:`ParsedEmail`, whose precomputed hash is reused)."""
+    result = {
+        "has_gravatar": False,
+        "profile_url": None,
+        "skipped": False,
+        "error": None,
+    }
+    if isinstance(email, ParsedEmail):
+        email_hash, domain = email.md5, email.domain
+    else:
+        normalized = email.lower().strip()
+        email_hash = _gravatar_hash(normalized)
+        domain = normalized.partition("@")[2]
+    if _gravatar_skip(domain):
+        result["skipped"] = True
+        return result
+    try:
+        has, profile_url = _gravatar_probe(email_hash, domain)
+    except urllib.error.HTTPError as exc:
+        result["error"] = "gravatar returned HTTP %d" % exc.code
+        return result
+    except OSError as exc:  # urllib URLError, requests exceptions, timeouts
+        result["error"] = str(exc)
+        return result
+    result["has_gravatar"] = has
+    result["profile_url"] = profile_url
+    return result
+
+
+# Built once; per-call interpolation happens via format_map rather than
+# re-assembling the ~20-line literal on every request.
+_WEB_PROMPT_TEMPLATE = (
+    "Search the web to verify whether this business contact is real.\n\n"
+    "Email: {email}\n"
+    "Name: {name}\n"
+    "Company: {company}\n\n"
+    "Check LinkedIn, the company website, news articles and business\n"
+    "directories. Return ONLY a valid JSON object, no markdown, no code\n"
+    "blocks, no explanation. The response must start with {{ and end with }}\n\n"
+    "JSON schema:\n"
+    "{{\n"
+    '  "person_confirmed": true,\n'
+    '  "role_confirmed": false,\n'
+    '  "sources": ["https://..."]\n'
+    "}}\n"
+)
+
+
+@functools.lru_cache(maxsize=10000)
+def _web_request_body(email, person_name, company_name):
+    """Serialized Perplexity request body, memoized so retries and
+    deduplicated leads skip prompt assembly and JSON encoding."""
+    prompt = _WEB_PROMPT_TEMPLATE.format_map(
+        {
+            "email": email,
+            "name": person_name or "Unknown",
+            "company": company_name or "Unknown",
+        }
+    )
+    return json.dumps(
+        {
+            "model": PERPLEXITY_MODEL,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0,
+            "response_format": {"type": "json_object"},
+        }
+    ).encode()
+
+
+def search_web_for_validation(email, person_name=None, company_name=None, api_key=None):
+    """Ask Perplexity (web search enabled) whether the person/email looks real.
+
+    response_format=json_object guarantees the completion is a bare JSON
+    document that parses directly; the first-``{``/last-``}`` slice that
+    lead_gen uses is kept only as a fallback for models that ignore the
+    format hint and wrap the JSON in prose.
+    """
+    api_key = api_key or PERPLEXITY_API_KEY
+    result = {
+        "person_confirmed": False,
+        "role_confirmed": False,
+        "sources": [],
+        "error": None,
+    }
+    if not api_key:
+        result["error"] = "PERPLEXITY_API_KEY not configured"
+        return result
+
+    body = _web_request_body(email, person_name, company_name)
+    try:
+        if _SESSION is not None:
+            response = _SESSION.post(
+                PERPLEXITY_URL,
+                data=body,
+                headers={
+                    "Authorization": "Bearer %s" % api_key,
+                    "Content-Type": "application/json",
+                },
+                timeout=30,
+            )
+            response.raise_for_status()
+            resp_data = response.json()
+        else:
+            req = urllib.request.Request(
+                PERPLEXITY_URL,
+                data=body,
+                headers={
+                    "Authorization": "Bearer %s" % api_key,
+                    "Content-Type": "application/json",
+                },
+                method="POST",
+            )
+            with urllib.request.urlopen(req, timeout=30) as response:
+                resp_data = json.loads(response.read())
+    except (OSError, ValueError) as exc:
+        result["error"] = "perplexity call failed: %s" % exc
+        return result
+
+    try:
+        content = resp_data["choices"][0]["message"]["content"]
+    except (KeyError, IndexError):
+        result["error"] = "unexpected perplexity response shape"
+        return result
+
+    try:
+        parsed = json.loads(content)
+    except ValueError:
+        # Model ignored the format hint and wrapped the JSON in prose.
+        start = content.find("{")
+        end = content.rfind("}")
+        if start < 0 or end <= start:
+            result["error"] = "no JSON object in perplexity reply"
+            return result
+        try:
+            parsed = json.loads(content[start : end + 1])
+        except ValueError:
+            result["error"] = "could not parse perplexity JSON"
+            return result
+
+    result["person_confirmed"] = bool(parsed.get("person_confirmed"))
+    result["role_confirmed"] = bool(parsed.get("role_confirmed"))
+    sources = parsed.get("sources")
+    if isinstance(sources, list):
+        result["sources"] = sources
+    return result
+
+# Constant SMTP commands, encoded once.
+_EHLO = b"EHLO verify.local\r\n"
+_QUIT = b"QUIT\r\n"
+_DEFAULT_SENDER = "verify@verify.local"
+_MAIL_FROM_DEFAULT = b"MAIL FROM:<verify@verify.local>\r\n"
+
+
+def _mail_from_bytes(sender):
+    if sender == _DEFAULT_SENDER:
+        return _MAIL_FROM_DEFAULT
+    return ("MAIL FROM:<%s>\r\n" % sender).encode()
+
+
+def _random_local():
+    """Random local-part for the catch-all probe."""
+    return secrets.token_hex(10)
+
+
+def _read_reply(rfile):
+    """Read one SMTP reply -- including multi-line replies, where
+    continuation lines carry ``NNN-`` -- and return ``(code, text)`` with
+    ``code`` as an int."""
+    lines = []
+    while True:
+        line = rfile.readline()
+        if not line:
+            raise ConnectionError("connection closed mid-reply")
+        lines.append(line.decode(errors="ignore").rstrip("\r\n"))
+        if line[3:4] != b"-":
+            break
+    code = line[:3]
+    if not code.isdigit():
+        raise ConnectionError("malformed SMTP reply: %r" % line)
+    return int(code), "\n".join(lines)
+
+
+def smtp_check(mx_host, email, sender=_DEFAULT_SENDER, timeout=10):
+    """Speak just enough SMTP to learn whether ``mx_host`` accepts RCPT TO
+    for ``email``.  Never sends DATA, always QUITs.  When the server
+    advertises PIPELINING (RFC 2920), MAIL FROM, RCPT TO and QUIT go out
+    in a single flush, saving a round trip."""
+    result = {"smtp_code": None, "accepted": False, "error": None}
+    sock = None
+    try:
+        sock = socket.create_connection((mx_host, 25), timeout=timeout)
+        rfile = sock.makefile("rb")
+        wfile = sock.makefile("wb")
+        code, text = _read_reply(rfile)
+        if code != 220:
+            result["error"] = "unexpected greeting: %s" % text
+            return result
+        wfile.write(_EHLO)
+        wfile.flush()
+        code, text = _read_reply(rfile)
+        if code != 250:
+            result["error"] = "EHLO rejected: %s" % text
+            return result
+        pipelining = "PIPELINING" in text.upper()
+        rcpt = ("RCPT TO:<%s>\r\n" % email).encode()
+        if pipelining:
+            wfile.write(_mail_from_bytes(sender) + rcpt + _QUIT)
+            wfile.flush()
+        else:
+            wfile.write(_mail_from_bytes(sender))
+            wfile.flush()
+        code, text = _read_reply(rfile)
+        if code != 250:
+            result["error"] = "MAIL FROM rejected: %s" % text
+            return result
+        if not pipelining:
+            wfile.write(rcpt)
+            wfile.flush()
+        code, text = _read_reply(rfile)
+        result["smtp_code"] = code
+        result["accepted"] = code == 250
+        if not pipelining:
+            wfile.write(_QUIT)
+            wfile.flush()
+    except (OSError, socket.timeout) as exc:
+        result["error"] = str(exc)
+    finally:
+        if sock is not None:
+            sock.close()
+    return result
+
+
+# MX answers are cached for the record's own TTL (clamped to an hour) so
+# repeated leads at the same domain -- gmail.com, outlook.com and friends
+# -- cost a dict lookup instead of a recursive-resolver round trip.
+_MX_CACHE = {}
+_MX_CACHE_MAX = 4096
+_MX_TTL_CAP = 3600
+_RESOLVER = None
+
+
+def _get_resolver():
+    """Lazily build one shared dnspython resolver with tuned timeouts."""
+    global _RESOLVER
+    if _RESOLVER is None:
+        import dns.resolver
+
+        _RESOLVER = dns.resolver.Resolver()
+        _RESOLVER.lifetime = 3.0
+    return _RESOLVER
+
+
+def _resolve_mx(domain):
+    """Return the sorted ``[(preference, host)]`` MX records for ``domain``,
+    served from the TTL cache when still fresh."""
+    now = time.monotonic()
+    cached = _MX_CACHE.get(domain)
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    answers = _get_resolver().resolve(domain, "MX")
+    records = sorted((r.preference, str(r.exchange).rstrip(".")) for r in answers)
+    ttl = min(getattr(answers.rrset, "ttl", _MX_TTL_CAP), _MX_TTL_CAP)
+    if len(_MX_CACHE) >= _MX_CACHE_MAX:
+        _MX_CACHE.clear()
+    _MX_CACHE[domain] = (now + ttl, records)
+    return records
+
+
+def smtp_check_many(mx_host, recipients, sender=_DEFAULT_SENDER, timeout=10):
+    """Like :func:`smtp_check` but probes every recipient on one SMTP
+    session: one connect, one EHLO, one MAIL FROM, then a RCPT TO per
+    recipient before a single QUIT.  When the server advertises
+    PIPELINING, the whole MAIL FROM/RCPT/QUIT batch goes out in a single
+    flush and the replies are drained afterwards.  Returns
+    ``{recipient: result}`` with the same per-address shape as
+    ``smtp_check``."""
+    results = {
+        r: {"smtp_code": None, "accepted": False, "error": None} for r in recipients
+    }
+    sock = None
+    session_error = None
+    answered = set()
+    try:
+        sock = socket.create_connection((mx_host, 25), timeout=timeout)
+        rfile = sock.makefile("rb")
+        wfile = sock.makefile("wb")
+        code, text = _read_reply(rfile)
+        if code != 220:
+            session_error = "unexpected greeting: %s" % text
+            return results
+        wfile.write(_EHLO)
+        wfile.flush()
+        code, text = _read_reply(rfile)
+        if code != 250:
+            session_error = "EHLO rejected: %s" % text
+            return results
+        pipelining = "PIPELINING" in text.upper()
+        if pipelining:
+            batch = _mail_from_bytes(sender)
+            for recipient in results:
+                batch += ("RCPT TO:<%s>\r\n" % recipient).encode()
+            wfile.write(batch + _QUIT)
+            wfile.flush()
+            code, text = _read_reply(rfile)
+            if code != 250:
+                session_error = "MAIL FROM rejected: %s" % text
+                return results
+            for recipient in results:
+                code, text = _read_reply(rfile)
+                results[recipient]["smtp_code"] = code
+                results[recipient]["accepted"] = code == 250
+                answered.add(recipient)
+        else:
+            wfile.write(_mail_from_bytes(sender))
+            wfile.flush()
+            code, text = _read_reply(rfile)
+            if code != 250:
+                session_error = "MAIL FROM rejected: %s" % text
+                return results
+            for recipient in results:
+                wfile.write(("RCPT TO:<%s>\r\n" % recipient).encode())
+                wfile.flush()
+                code, text = _read_reply(rfile)
+                results[recipient]["smtp_code"] = code
+                results[recipient]["accepted"] = code == 250
+                answered.add(recipient)
+            wfile.write(_QUIT)
+            wfile.flush()
+    except (OSError, socket.timeout) as exc:
+        session_error = str(exc)
+    finally:
+        if sock is not None:
+            sock.close()
+        if session_error is not None:
+            for recipient, res in results.items():
+                if recipient not in answered:
+                    res["error"] = session_error
+    return results
+
+
+def verify_email(email):
+    """Deliverability probe: MX lookup plus an SMTP RCPT TO conversation,
+    with a randomized catch-all check when the address is accepted."""
+    result = {
+        "email": email,
+        "valid_syntax": False,
+        "domain": None,
+        "mx_host": None,
+        "smtp_code": None,
+        "deliverable": None,
+        "catch_all": None,
+        "definitive_failure": False,
+        "error": None,
+    }
+    parsed = parse_email(email)
+    if parsed is None:
+        result["error"] = "invalid email syntax"
+        return result
+    result["valid_syntax"] = True
+    email = parsed.raw
+    domain = parsed.domain
+    result["domain"] = domain
+
+    try:
+        records = _resolve_mx(domain)
+    except ImportError:
+        result["error"] = "dnspython is required for MX lookups"
+        return result
+    except Exception as exc:  # NXDOMAIN, timeout, no answer...
+        result["error"] = "MX lookup failed: %s" % exc
+        result["definitive_failure"] = True
+        return result
+    if not records:
+        result["error"] = "no MX records"
+        result["definitive_failure"] = True
+        return result
+    mx_host = records[0][1]
+    result["mx_host"] = mx_host
+
+    probe = smtp_check(mx_host, email)
+    result["smtp_code"] = probe["smtp_code"]
+    if probe["error"]:
+        result["error"] = probe["error"]
+        return result
+    if not probe["accepted"]:
+        result["deliverable"] = False
+        if probe["smtp_code"] is not None and 550 <= probe["smtp_code"] < 560:
+            result["definitive_failure"] = True
+        return result
+
+    # Accepted -- but a catch-all server accepts anything, so probe a
+    # random local-part that cannot plausibly exist.
+    fake_probe = smtp_check(mx_host, "%s@%s" % (_random_local(), domain))
+    result["catch_all"] = fake_probe["accepted"]
+    result["deliverable"] = True
+    return result
+
+
+def verify_emails(emails):
+    """Batch deliverability probe.  Groups the input by domain so each
+    domain pays one MX lookup and one SMTP session (with one RCPT TO per
+    address plus a single randomized catch-all probe) instead of a full
+    DNS+SMTP round per email.  Returns results in input order with the
+    same per-address shape as :func:`verify_email`."""
+    results = {}
+    by_domain = {}
+    for raw in emails:
+        if raw in results:
+            continue
+        parsed = parse_email(raw)
+        entry = {
+            "email": raw,
+            "valid_syntax": False,
+            "domain": None,
+            "mx_host": None,
+            "smtp_code": None,
+            "deliverable": None,
+            "catch_all": None,
+            "definitive_failure": False,
+            "error": None,
+        }
+        results[raw] = entry
+        if parsed is None:
+            entry["error"] = "invalid email syntax"
+            continue
+        entry["valid_syntax"] = True
+        entry["domain"] = parsed.domain
+        by_domain.setdefault(parsed.domain, []).append((raw, parsed.raw))
+
+    if by_domain:
+        for domain, pairs in by_domain.items():
+            try:
+                records = _resolve_mx(domain)
+            except ImportError:
+                for raw, _ in pairs:
+                    results[raw]["error"] = "dnspython is required for MX lookups"
+                continue
+            except Exception as exc:  # NXDOMAIN, timeout, no answer...
+                for raw, _ in pairs:
+                    results[raw]["error"] = "MX lookup failed: %s" % exc
+                    results[raw]["definitive_failure"] = True
+                continue
+            if not records:
+                for raw, _ in pairs:
+                    results[raw]["error"] = "no MX records"
+                    results[raw]["definitive_failure"] = True
+                continue
+            mx_host = records[0][1]
+
+            # One session covers every address at this domain plus the
+            # catch-all probe for a random local-part.
+            fake_email = "%s@%s" % (_random_local(), domain)
+            recipients = [normalized for _, normalized in pairs] + [fake_email]
+            probes = smtp_check_many(mx_host, recipients)
+            catch_all = probes[fake_email]["accepted"]
+
+            for raw, normalized in pairs:
+                entry = results[raw]
+                entry["mx_host"] = mx_host
+                probe = probes[normalized]
+                entry["smtp_code"] = probe["smtp_code"]
+                if probe["error"]:
+                    entry["error"] = probe["error"]
+                    continue
+                if not probe["accepted"]:
+                    entry["deliverable"] = False
+                    if probe["smtp_code"] is not None and 550 <= probe["smtp_code"] < 560:
+                        entry["definitive_failure"] = True
+                    continue
+                entry["deliverable"] = True
+                entry["catch_all"] = catch_all
+
+    return [results[raw] for raw in emails]
+
+
+def _score_kernel(has_gravatar, pattern_kind, name_kind, web_person_ok, scores, levels):
+    for i in range(len(scores)):
+        score = 0
+        if has_gravatar[i]:
+            score += _SCORE_GRAVATAR
+        if pattern_kind[i] >= 1:
+            score += _SCORE_PATTERN
+        if pattern_kind[i] == 2:
+            score += _SCORE_PATTERN_KNOWN
+        if name_kind[i] == 2:
+            score += _SCORE_NAME_EXACT
+        elif name_kind[i] == 1:
+            score += _SCORE_NAME_PARTIAL
+        if web_person_ok[i]:
+            score += _SCORE_WEB_PERSON
+        scores[i] = score
+        if score >= _HIGH_THRESHOLD:
+            levels[i] = 2
+        elif score >= _MEDIUM_THRESHOLD:
+            levels[i] = 1
+        else:
+            levels[i] = 0
+
+
+if _njit is not None:
+    _score_kernel = _njit(cache=True)(_score_kernel)
+
+
+def score_signals_batch(has_gravatar, pattern_kind, name_kind, web_person_ok):
+    """Score a whole batch from structure-of-arrays signal columns.
+
+    ``pattern_kind``: 0 unrecognized, 1 recognized convention, 2 matches a
+    known company pattern.  ``name_kind``: 0 no match, 1 partial, 2 exact.
+    Returns ``(scores, levels)`` where ``levels`` indexes
+    ``_CONFIDENCE_LEVELS``; numpy arrays when numpy is installed (and the
+    kernel runs JIT-compiled under numba), plain lists otherwise.
+    """
+    n = len(has_gravatar)
+    if _np is not None:
+        has_gravatar = _np.asarray(has_gravatar, dtype=_np.bool_)
+        pattern_kind = _np.asarray(pattern_kind, dtype=_np.int8)
+        name_kind = _np.asarray(name_kind, dtype=_np.int8)
+        web_person_ok = _np.asarray(web_person_ok, dtype=_np.bool_)
+        scores = _np.zeros(n, dtype=_np.int32)
+        levels = _np.zeros(n, dtype=_np.int8)
+    else:
+        scores = [0] * n
+        levels = [0] * n
+    _score_kernel(has_gravatar, pattern_kind, name_kind, web_person_ok, scores, levels)
+    return scores, levels
+
+
+def validate_email_multi_signal(
+    email,
+    person_name=None,
+    company_name=None,
+    known_emails=None,
+    api_key=None,
+    early_exit=True,
+):
+    """Score ``email`` with every available signal and return a confidence
+    verdict.  Network signals (Gravatar, Perplexity) degrade gracefully --
+    an error in one signal never sinks the whole validation.
+
+    With ``early_exit`` (the default) the Perplexity call -- by far the
+    most expensive signal -- is skipped when the cheaper signals have
+    already settled the verdict: either the score is high without it, or
+    even a confirmed person could not lift the lead out of "low".  Pass
+    ``early_exit=False`` for a full report with every signal populated.
+    """
+    result = {
+        "email": email,
+        "valid_syntax": False,
+        "signals": {},
+        "confidence_score": 0,
+        "confidence_level": "low",
+        "evidence": [],
+        "recommendation": "",
+    }
+    parsed = parse_email(email)
+    if parsed is None:
+        result["recommendation"] = "Reject: not a syntactically valid email address."
+        return result
+    result["valid_syntax"] = True
+
+    # Kick off the network signals, then do the pure-Python signals while
+    # they are in flight.  Under early_exit the Perplexity submission is
+    # deferred until the cheap signals have shown it can still matter.
+    f_gravatar = _IO_POOL.submit(check_gravatar, parsed)
+    want_web = bool(api_key or PERPLEXITY_API_KEY)
+    f_web = None
+    if want_web and not early_exit:
+        f_web = _IO_POOL.submit(
+            search_web_for_validation, parsed.raw, person_name, company_name, api_key
+        )
+
+    pattern_info = check_email_pattern(parsed, known_emails)
+    name_info = None
+    if person_name:
+        guessed = extract_name_from_email(parsed)
+        name_parts = [p for p in person_name.lower().split() if p]
+        guessed_parts = [p for p in (guessed["first"], guessed["last"]) if p]
+        exact = bool(name_parts) and all(
+            any(np.startswith(gp) or gp.startswith(np) for np in name_parts)
+            for gp in guessed_parts
+        )
+        partial = any(
+            np.startswith(gp) or gp.startswith(np)
+            for np in name_parts
+            for gp in guessed_parts
+        )
+        name_info = {
+            "extracted": guessed,
+            "exact": exact,
+            "partial": partial and not exact,
+        }
+
+    # Signal: Gravatar
+    gravatar = f_gravatar.result()
+    result["signals"]["gravatar"] = gravatar
+    if gravatar["has_gravatar"]:
+        result["confidence_score"] += _SCORE_GRAVATAR
+        result["evidence"].append("Email has a registered Gravatar profile")
+
+    # Signal: local-part pattern vs known company emails
+    result["signals"]["pattern"] = pattern_info
+    if pattern_info["pattern"] is not None:
+        result["confidence_score"] += _SCORE_PATTERN
+        result["evidence"].append(
+            "Local part follows the '%s' convention" % pattern_info["pattern"]
+        )
+    if pattern_info["matches_known_pattern"]:
+        result["confidence_score"] += _SCORE_PATTERN_KNOWN
+        result["evidence"].append(
+            "Convention matches the company's known email pattern"
+        )
+
+    # Signal: name agreement
+    if name_info is not None:
+        result["signals"]["name_match"] = name_info
+        if name_info["exact"]:
+            result["confidence_score"] += _SCORE_NAME_EXACT
+            result["evidence"].append("Local part matches the contact's name")
+        elif name_info["partial"]:
+            result["confidence_score"] += _SCORE_NAME_PARTIAL
+            result["evidence"].append("Local part partially matches the contact's name")
+
+    # Signal: Perplexity web search (only when a key is available)
+    if want_web and f_web is None:
+        score = result["confidence_score"]
+        if score >= _HIGH_THRESHOLD:
+            # Already provably high without the web signal.
+            pass
+        elif score + _SCORE_WEB_PERSON < _MEDIUM_THRESHOLD:
+            # Even a confirmed person cannot reach "medium"; don't pay
+            # for the round trip on a hopeless lead.
+            pass
+        else:
+            f_web = _IO_POOL.submit(
+                search_web_for_validation, parsed.raw, person_name, company_name, api_key
+            )
+    if f_web is not None:
+        web = f_web.result()
+        result["signals"]["web"] = web
+        if web["person_confirmed"]:
+            result["confidence_score"] += _SCORE_WEB_PERSON
+            result["evidence"].append("Web search confirms the person exists")
+        if web["role_confirmed"]:
+            result["evidence"].append("Web search confirms the stated role")
+
+    score = result["confidence_score"]
+    if score >= _HIGH_THRESHOLD:
+        result["confidence_level"] = "high"
+        result["recommendation"] = "Use: multiple independent signals agree."
+    elif score >= _MEDIUM_THRESHOLD:
+        result["confidence_level"] = "medium"
+        result["recommendation"] = "Use with caution: some signals agree."
+    else:
+        result["confidence_level"] = "low"
+        result["recommendation"] = "Verify manually before outreach."
+    return result
+
+
+async def verify_email_async(email):
+    """Async facade over :func:`verify_email`: the DNS+SMTP dance runs in
+    a worker thread, so one event loop can keep many probes in flight."""
+    return await asyncio.to_thread(verify_email, email)
+
+
+async def validate_email_multi_signal_async(
+    email,
+    person_name=None,
+    company_name=None,
+    known_emails=None,
+    api_key=None,
+    early_exit=True,
+):
+    """Async facade over :func:`validate_email_multi_signal`.  The signal
+    fan-out inside still overlaps Gravatar and Perplexity on _IO_POOL;
+    this wrapper just keeps the whole validation off the event loop."""
+    return await asyncio.to_thread(
+        validate_email_multi_signal,
+        email,
+        person_name=person_name,
+        company_name=company_name,
+        known_emails=known_emails,
+        api_key=api_key,
+        early_exit=early_exit,
+    )
+
+
+async def validate_emails_async(
+    leads,
+    known_emails=None,
+    api_key=None,
+    early_exit=True,
+    concurrency=50,
+):
+    """Validate many leads concurrently on one event loop.
+
+    ``leads`` is an iterable of bare email strings or
+    ``(email, person_name, company_name)`` tuples.  In-flight validations
+    are bounded by ``concurrency`` via a semaphore; results come back in
+    input order.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _one(lead):
+        if isinstance(lead, str):
+            email, person_name, company_name = lead, None, None
+        else:
+            email, person_name, company_name = lead
+        async with semaphore:
+            return await validate_email_multi_signal_async(
+                email,
+                person_name=person_name,
+                company_name=company_name,
+                known_emails=known_emails,
+                api_key=api_key,
+                early_exit=early_exit,
+            )
+
+    return await asyncio.gather(*(_one(lead) for lead in leads))
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("usage: email_validator_multi_signal.py EMAIL [PERSON_NAME]")
+        raise SystemExit(1)
+    verdict = validate_email_multi_signal(
+        sys.argv[1], person_name=sys.argv[2] if len(sys.argv) > 2 else None
+    )
+    print(json.dumps(verdict, indent=2))